@@ -1,200 +1,748 @@
+import atexit
+import functools
 import heapq
 import json
 import os
+from array import array
+from collections import defaultdict, deque
 from datetime import datetime
 
+try:
+    import orjson  # Serialización JSON en C, opcional
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np  # Vectorización de consultas sobre los arrays, opcional
+except ImportError:
+    np = None
+
+try:
+    from numba import njit  # Compilación JIT del recorrido de tareas, opcional
+except ImportError:
+    njit = None
+
+
+def _dumps(data):
+    """
+    Serializa a bytes JSON compactos, con orjson si está disponible.
+    """
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+
+def _loads(raw):
+    """
+    Deserializa bytes JSON, con orjson si está disponible.
+    """
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+if njit is not None and np is not None:
+    @njit(cache=True)
+    def _executable_ids_jit(pending_counts, priorities):
+        """
+        Devuelve los ids con contador de pendientes a cero, ordenados de forma
+        estable por prioridad (y por id en caso de empate).
+        """
+        count = 0
+        for task_id in range(pending_counts.shape[0]):
+            if pending_counts[task_id] == 0:
+                count += 1
+        ids = np.empty(count, dtype=np.int64)
+        index = 0
+        for task_id in range(pending_counts.shape[0]):
+            if pending_counts[task_id] == 0:
+                ids[index] = task_id
+                index += 1
+        return ids[np.argsort(priorities[ids], kind='mergesort')]
+else:
+    _executable_ids_jit = None
+
+# Por debajo de este número de tareas, compilar el kernel no compensa
+_JIT_MIN_TASKS = 10000
+
+
+class IndexedHeap:
+    """
+    Heap binario de entradas (prioridad, id) que recuerda la posición de
+    cada entrada para poder eliminarla en O(log n). El id es único por tarea,
+    sirve como clave y desempata por orden de inserción.
+    """
+    def __init__(self, entries=()):
+        self.heap = list(entries)
+        heapq.heapify(self.heap)
+        self.pos = {entry[1]: index for index, entry in enumerate(self.heap)}
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __iter__(self):
+        return iter(self.heap)
+
+    def push(self, entry):
+        """
+        Inserta una entrada y la sube hasta su posición.
+        """
+        self.heap.append(entry)
+        self.pos[entry[1]] = len(self.heap) - 1
+        self._sift_up(len(self.heap) - 1)
+
+    def pop(self):
+        """
+        Extrae la entrada de menor prioridad.
+        """
+        if not self.heap:
+            raise IndexError("pop de un heap vacío")
+        return self.remove(self.heap[0][1])
+
+    def remove(self, key):
+        """
+        Elimina la entrada con el id 'key' sustituyéndola por la última
+        y recolocando esta.
+        """
+        index = self.pos.pop(key)
+        last = self.heap.pop()
+        if index == len(self.heap):
+            return last
+        removed = self.heap[index]
+        self.heap[index] = last
+        self.pos[last[1]] = index
+        self._sift_up(index)
+        self._sift_down(self.pos[last[1]])
+        return removed
+
+    def _swap(self, i, j):
+        heap = self.heap
+        heap[i], heap[j] = heap[j], heap[i]
+        self.pos[heap[i][1]] = i
+        self.pos[heap[j][1]] = j
+
+    def _sift_up(self, index):
+        heap = self.heap
+        while index > 0:
+            parent = (index - 1) // 2
+            if heap[index] >= heap[parent]:
+                break
+            self._swap(index, parent)
+            index = parent
+
+    def _sift_down(self, index):
+        heap = self.heap
+        size = len(heap)
+        while True:
+            smallest = index
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < size and heap[child] < heap[smallest]:
+                    smallest = child
+            if smallest == index:
+                break
+            self._swap(index, smallest)
+            index = smallest
+
 class TaskManager:
     def __init__(self, filename='tasks.json'):
-        self.tasks = []  # Cola de prioridad de tareas
+        self.tasks = IndexedHeap()  # Cola de prioridad de (prioridad, id de tarea)
+        # Atributos de las tareas en arrays paralelos indexados por id de tarea
+        self.names = []
+        self.priorities = array('q')
+        self.deadlines = []
+        self.deps = []
+        self.pending_count = array('i')  # Dependencias pendientes por tarea (-1 = completada)
         self.completed_tasks = set()  # Conjunto de tareas completadas
-        self.task_dependencies = {}  # Diccionario para rastrear dependencias inversas
+        self.task_dependencies = defaultdict(set)  # Diccionario para rastrear dependencias inversas
+        self.task_by_name = {}  # Índice nombre -> id de tarea pendiente para búsquedas O(1)
         self.filename = filename
-        self.counter = 0  # Contador único para las tareas
-        self.load_tasks()
+        self.journal_filename = filename + '.journal'  # Operaciones posteriores a la instantánea
+        self._generation = 0  # Generación de la instantánea a la que aplica el diario
+        self._snapshot_size = 0
+        self._journal_fd = None
+        self._journal_size = 0
+        self._version = 0  # Se incrementa con cada inserción o eliminación
+        self._sorted_view = None  # Caché de (versión, tareas ordenadas)
+        self._completed_version = 0  # Se incrementa con cada tarea completada
+        self._executable_cache = functools.lru_cache(maxsize=4096)(self._compute_executable)
+        self._load_snapshot()
+        self._open_journal()
+        atexit.register(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_task(self, task_id):
+        """
+        Reconstruye el diccionario de una tarea a partir de los arrays.
+        """
+        return {
+            'name': self.names[task_id],
+            'priority': self.priorities[task_id],
+            'dependencies': list(self.deps[task_id]),
+            'deadline': self.deadlines[task_id]
+        }
 
-    def is_task_executable(self, task):
+    def _new_task_id(self, name, priority, dependencies, deadline):
+        """
+        Guarda los atributos de una tarea en los arrays y devuelve su id.
+        """
+        self.priorities.append(priority)
+        self.names.append(name)
+        self.deadlines.append(deadline)
+        self.deps.append(tuple(dependencies))
+        self.pending_count.append(len({dep for dep in dependencies if dep not in self.completed_tasks}))
+        return len(self.names) - 1
+
+    def _repack_tasks(self):
+        """
+        Renumera las tareas pendientes con ids consecutivos, liberando los
+        huecos que dejan las completadas en los arrays. Se conserva el orden
+        relativo de los ids para no alterar los desempates del heap.
+        """
+        if len(self.names) == len(self.tasks):
+            return
+        
+        old_ids = sorted(task_id for _, task_id in self.tasks)
+        new_ids = {old_id: new_id for new_id, old_id in enumerate(old_ids)}
+        self.names = [self.names[old_id] for old_id in old_ids]
+        self.priorities = array('q', (self.priorities[old_id] for old_id in old_ids))
+        self.deadlines = [self.deadlines[old_id] for old_id in old_ids]
+        self.deps = [self.deps[old_id] for old_id in old_ids]
+        self.pending_count = array('i', (self.pending_count[old_id] for old_id in old_ids))
+        self.task_by_name = {name: new_ids[old_id] for name, old_id in self.task_by_name.items()}
+        self.tasks = IndexedHeap((priority, task_id) for task_id, priority in enumerate(self.priorities))
+        self._version += 1
+        self._executable_cache.cache_clear()
+
+    def _is_executable(self, task_id):
+        """
+        Comprobación rápida de ejecutabilidad, sin construir la lista de
+        dependencias pendientes.
+        """
+        return self.pending_count[task_id] == 0
+
+    def is_task_executable(self, task_id):
         """
         Verifica si una tarea es ejecutable basándose en sus dependencias.
+        Devuelve también las dependencias pendientes para poder mostrarlas.
+        El resultado se cachea hasta que se complete otra tarea.
         """
-        if not task['dependencies']:
+        return self._executable_cache(task_id, self._completed_version)
+
+    def _compute_executable(self, task_id, completed_version):
+        """
+        Calcula la ejecutabilidad de una tarea. 'completed_version' solo forma
+        parte de la clave de la caché.
+        """
+        if self._is_executable(task_id):
             return True, []
         
+        # La lista de pendientes solo se construye cuando hay que mostrarla
         pending_dependencies = [
-            dep for dep in task['dependencies'] 
+            dep for dep in self.deps[task_id] 
             if dep not in self.completed_tasks
         ]
-        return len(pending_dependencies) == 0, pending_dependencies
+        return False, pending_dependencies
 
     def add_task(self, name, priority, dependencies=None, deadline=None):
         """
         Añade una nueva tarea con dependencias flexibles y fecha de vencimiento.
         Valida que las dependencias ingresadas existan.
         """
+        self._ensure_open()
+        
         if not name or name.strip() == '':
             raise ValueError("El nombre de la tarea NO puede estar vacío")
         
+        if name in self.task_by_name:
+            raise ValueError(f"Ya existe una tarea pendiente llamada '{name}'")
+        
         try:
             priority = int(priority)
         except ValueError:
             raise ValueError("La prioridad DEBE ser un número entero")
+        if not -2**63 <= priority < 2**63:
+            raise ValueError("La prioridad está fuera de rango")
         
         dependencies = dependencies or []
         
         # Validar que las dependencias existan
         invalid_dependencies = [
             dep for dep in dependencies 
-            if dep not in [task['name'] for _, _, task in self.tasks] and dep not in self.completed_tasks
+            if dep not in self.task_by_name and dep not in self.completed_tasks
         ]
         
         if invalid_dependencies:
             raise ValueError(f"Las siguientes dependencias no existen: {', '.join(invalid_dependencies)}")
         
-        task = {
+        # No hace falta buscar ciclos: el nombre nuevo no está pendiente, así
+        # que ninguna tarea espera por él, y solo puede depender de tareas
+        # que ya existen
+        
+        # Se registra en el diario antes de modificar el estado en memoria
+        self._append_journal({'op': 'add', 'task': {
             'name': name,
             'priority': priority,
-            'dependencies': dependencies,
+            'dependencies': list(dependencies),
             'deadline': deadline
-        }
-        
-        self.counter += 1
-        heapq.heappush(self.tasks, (priority, self.counter, task))
+        }})
+        task_id = self._insert_task(name, priority, dependencies, deadline)
         
-        is_executable, pending_deps = self.is_task_executable(task)
-        
-        for dep in dependencies:
-            if dep not in self.task_dependencies:
-                self.task_dependencies[dep] = []
-            self.task_dependencies[dep].append(name)
-        
-        print(f"\n✅ Tarea '{name}' añadida exitosamente.")
+        lineas = [f"\n✅ Tarea '{name}' añadida exitosamente."]
         if dependencies:
-            print("🔗 Dependencias requeridas:")
+            lineas.append("🔗 Dependencias requeridas:")
             for dep in dependencies:
-                print(f"   - {dep}")
-        if is_executable:
-            print("🟢 Tarea ejecutable: Todas las dependencias están completadas.")
+                lineas.append(f"   - {dep}")
+        if self._is_executable(task_id):
+            lineas.append("🟢 Tarea ejecutable: Todas las dependencias están completadas.")
         else:
-            print("🔴 Tarea NO ejecutable. Dependencias pendientes:")
-            for dep in pending_deps:
-                print(f"   - {dep}")
+            lineas.append("🔴 Tarea NO ejecutable. Dependencias pendientes:")
+            for dep in self.is_task_executable(task_id)[1]:
+                lineas.append(f"   - {dep}")
+        print('\n'.join(lineas))
+        
+        return self.get_task(task_id)
+
+    def _insert_task(self, name, priority, dependencies, deadline):
+        """
+        Inserta una tarea ya validada en las estructuras y devuelve su id.
+        """
+        task_id = self._new_task_id(name, priority, dependencies, deadline)
+
+        self.tasks.push((priority, task_id))
+        self.task_by_name[name] = task_id
+        self._version += 1
         
-        self.save_tasks()
-        return task
+        for dep in dependencies:
+            self.task_dependencies[dep].add(name)
+        return task_id
 
     def complete_task(self, task_name):
         """
         Marca una tarea como completada con reglas de dependencia.
         """
-        for index, (priority, _, task) in enumerate(self.tasks):
-            if task['name'] == task_name:
-                # Verificar si todas las dependencias directas han sido completadas
-                _, pending_dependencies = self.is_task_executable(task)
-                if pending_dependencies:
-                    print(f"\n❌ NO se puede completar '{task_name}'.")
-                    print("Razón: Las siguientes dependencias no han sido completadas:")
-                    for dep in pending_dependencies:
-                        print(f"   - {dep}")
-                    return
-
-                # Verificar dependencias inversas (tareas que dependen de esta tarea)
-                if task_name in self.task_dependencies:
-                    dependientes = self.task_dependencies[task_name]
-                    tareas_bloqueadas = [
-                        dep for dep in dependientes 
-                        if dep not in self.completed_tasks
-                    ]
-                    if tareas_bloqueadas:
-                        print(f"\n❌ NO se puede completar '{task_name}'.")
-                        print("Razón: Otras tareas dependen de esta:")
-                        for dep in tareas_bloqueadas:
-                            print(f"   - {dep}")
-                        return
-
-                # Eliminar tarea de la lista
-                del self.tasks[index]
-                heapq.heapify(self.tasks)
-
-                # Marcar como completada
-                self.completed_tasks.add(task_name)
-
-                print(f"\n✅ Tarea '{task_name}' completada.")
-
-                # Verificar ejecutabilidad de tareas restantes
-                self.check_task_executability()
-
-                # Guardar cambios
-                self.save_tasks()
+        self._ensure_open()
+        
+        task_id = self.task_by_name.get(task_name)
+        if task_id is None:
+            print(f"\n❌ Tarea '{task_name}' no encontrada.")
+            return
+
+        lineas = []
+
+        # Verificar si todas las dependencias directas han sido completadas
+        if not self._is_executable(task_id):
+            _, pending_dependencies = self.is_task_executable(task_id)
+            lineas.append(f"\n❌ NO se puede completar '{task_name}'.")
+            lineas.append("Razón: Las siguientes dependencias no han sido completadas:")
+            for dep in pending_dependencies:
+                lineas.append(f"   - {dep}")
+            print('\n'.join(lineas))
+            return
+
+        # Verificar dependencias inversas (tareas que dependen de esta tarea)
+        if task_name in self.task_dependencies:
+            dependientes = self.task_dependencies[task_name]
+            tareas_bloqueadas = [
+                dep for dep in sorted(dependientes) 
+                if dep not in self.completed_tasks
+            ]
+            if tareas_bloqueadas:
+                lineas.append(f"\n❌ NO se puede completar '{task_name}'.")
+                lineas.append("Razón: Otras tareas dependen de esta:")
+                for dep in tareas_bloqueadas:
+                    lineas.append(f"   - {dep}")
+                print('\n'.join(lineas))
                 return
 
-        print(f"\n❌ Tarea '{task_name}' no encontrada.")
+        # Se registra en el diario antes de modificar el estado en memoria
+        self._append_journal({'op': 'complete', 'name': task_name})
+        self._remove_task(task_name)
+
+        lineas.append(f"\n✅ Tarea '{task_name}' completada.")
+
+        # Verificar ejecutabilidad de tareas restantes
+        lineas.extend(self._executability_report())
+        print('\n'.join(lineas))
+
+    def _remove_task(self, task_name):
+        """
+        Saca de la cola una tarea pendiente y la marca como completada.
+        """
+        task_id = self.task_by_name.pop(task_name)
+
+        # Eliminar tarea de la cola
+        self.tasks.remove(task_id)
+        self._version += 1
+
+        # Marcar como completada y desbloquear a las tareas dependientes
+        if task_name not in self.completed_tasks:
+            for dependiente in self.task_dependencies.get(task_name, ()):
+                dependiente_id = self.task_by_name.get(dependiente)
+                if dependiente_id is not None:
+                    self.pending_count[dependiente_id] -= 1
+        self.completed_tasks.add(task_name)
+        self.pending_count[task_id] = -1
+        self._completed_version += 1
+
+    def pending_tasks(self):
+        """
+        Devuelve las entradas pendientes del heap.
+        """
+        return list(self.tasks)
+
+    def sorted_tasks(self):
+        """
+        Devuelve las tareas pendientes ordenadas por prioridad, reutilizando
+        la vista anterior si no ha habido cambios.
+        """
+        if self._sorted_view is None or self._sorted_view[0] != self._version:
+            pending = self.pending_tasks()
+            self._sorted_view = (self._version, heapq.nsmallest(len(pending), pending))
+        return self._sorted_view[1]
+
+    def executable_task_ids(self, k=None):
+        """
+        Devuelve los ids de las tareas ejecutables ordenados por prioridad,
+        limitados a las 'k' primeras si se indica. Con numba y muchas tareas,
+        la consulta se compila a código nativo; con numpy, se resuelve con
+        operaciones vectorizadas sobre los arrays.
+        
+        Los arrays se copian a numpy: una vista sobre el buffer de array.array
+        que siguiera viva impediría añadir tareas después.
+        """
+        if not self.names:
+            return []
+        if np is not None:
+            pending = np.array(self.pending_count, dtype=np.int32)
+            priorities = np.array(self.priorities, dtype=np.int64)
+            if _executable_ids_jit is not None and len(self.names) >= _JIT_MIN_TASKS:
+                return _executable_ids_jit(pending, priorities)[:k].tolist()
+            ids = np.flatnonzero(pending == 0)
+            priorities = priorities[ids]
+            if k is not None and 0 < k < len(ids):
+                # Se conservan los empates con la k-ésima prioridad para desempatar por id
+                kth = np.partition(priorities, k - 1)[k - 1]
+                keep = priorities <= kth
+                ids, priorities = ids[keep], priorities[keep]
+            return ids[np.lexsort((ids, priorities))][:k].tolist()
+        
+        ids = [task_id for _, task_id in self.tasks if self.pending_count[task_id] == 0]
+        key = lambda task_id: (self.priorities[task_id], task_id)
+        if k is not None:
+            return heapq.nsmallest(k, ids, key=key)
+        return sorted(ids, key=key)
 
     def check_task_executability(self):
         """
         Verifica y notifica la ejecutabilidad de todas las tareas pendientes.
         """
-        print("\n🔍 Verificando ejecutabilidad de tareas pendientes...")
+        print('\n'.join(self._executability_report()))
+
+    def _executability_report(self):
+        """
+        Construye las líneas del informe de ejecutabilidad de las tareas
+        pendientes. Recorre el grafo con el algoritmo de Kahn, de modo que las
+        tareas bloqueadas se listan en el orden en que se irán desbloqueando.
+        """
+        lineas = ["\n🔍 Verificando ejecutabilidad de tareas pendientes..."]
         
         executable_tasks = []
         non_executable_tasks = []
         
-        for priority, _, task in self.tasks:
-            is_executable, pending_deps = self.is_task_executable(task)
+        # Copia local de los contadores, por id de tarea, para no alterar el estado
+        pendientes = self.pending_tasks()
+        names = self.names
+        restantes = {task_id: self.pending_count[task_id] for _, task_id in pendientes}
+        cola = deque(self.executable_task_ids())
+        orden = []
+        while cola:
+            task_id = cola.popleft()
+            orden.append(task_id)
+            for dependiente in sorted(self.task_dependencies.get(names[task_id], ())):
+                dependiente_id = self.task_by_name.get(dependiente)
+                if dependiente_id in restantes:
+                    restantes[dependiente_id] -= 1
+                    if restantes[dependiente_id] == 0:
+                        cola.append(dependiente_id)
+        
+        # Las tareas que nunca se alcanzan quedan bloqueadas por un ciclo
+        alcanzadas = set(orden)
+        orden.extend(task_id for _, task_id in pendientes if task_id not in alcanzadas)
+        
+        for task_id in orden:
+            is_executable, pending_deps = self.is_task_executable(task_id)
             
             if is_executable:
-                executable_tasks.append(task['name'])
+                executable_tasks.append(names[task_id])
             else:
-                non_executable_tasks.append((task['name'], pending_deps))
+                non_executable_tasks.append((names[task_id], pending_deps))
         
         if executable_tasks:
-            print("🟢 Tareas ejecutables:")
+            lineas.append("🟢 Tareas ejecutables:")
             for task in executable_tasks:
-                print(f"   - {task}")
+                lineas.append(f"   - {task}")
         
         if non_executable_tasks:
-            print("🔴 Tareas NO ejecutables:")
+            lineas.append("🔴 Tareas NO ejecutables:")
             for task, deps in non_executable_tasks:
-                print(f"   - {task}")
-                print("     Dependencias pendientes:")
+                lineas.append(f"   - {task}")
+                lineas.append("     Dependencias pendientes:")
                 for dep in deps:
-                    print(f"       • {dep}")
+                    lineas.append(f"       • {dep}")
+        
+        return lineas
 
     def load_tasks(self):
+        """
+        Vuelve a cargar las tareas desde disco: la instantánea y, encima, las
+        operaciones registradas en el diario.
+        """
+        self._ensure_open()
+        os.close(self._journal_fd)
+        self._journal_fd = None
+        self._load_snapshot()
+        self._open_journal()
+
+    def _load_snapshot(self):
         """
         Carga las tareas desde un archivo JSON.
         """
         if os.path.exists(self.filename):
             try:
-                with open(self.filename, 'r') as f:
-                    data = json.load(f)
-                    self.tasks = [(task['priority'], index, task) for index, task in enumerate(data.get('tasks', []))]
-                    self.completed_tasks = set(data.get('completed_tasks', []))
-                    self.task_dependencies = data.get('task_dependencies', {})
-                    self.counter = len(self.tasks)
+                with open(self.filename, 'rb') as f:
+                    data = _loads(f.read())
+                    self.completed_tasks = set(data.get('completed_tasks', ()))
+                    self.task_dependencies = defaultdict(set, {
+                        dep: set(dependientes)
+                        for dep, dependientes in data.get('task_dependencies', {}).items()
+                    })
+                    entries = []
+                    self.names = []
+                    self.priorities = array('q')
+                    self.deadlines = []
+                    self.deps = []
+                    self.pending_count = array('i')
+                    self.task_by_name = {}
+                    for task in data.get('tasks', ()):
+                        # Versiones anteriores permitían nombres pendientes
+                        # repetidos: se conserva solo la primera tarea
+                        if task['name'] in self.task_by_name:
+                            self._drop_duplicate(task)
+                            continue
+                        task_id = self._new_task_id(
+                            task['name'], task['priority'], task['dependencies'], task.get('deadline')
+                        )
+                        entries.append((task['priority'], task_id))
+                        self.task_by_name[task['name']] = task_id
+                    self.tasks = IndexedHeap(entries)
+                    self._version += 1
+                    self._executable_cache.cache_clear()
+                    self._generation = data.get('generation', 0)
             except (json.JSONDecodeError, FileNotFoundError):
-                self.tasks = []
+                self.tasks = IndexedHeap()
+                self.names = []
+                self.priorities = array('q')
+                self.deadlines = []
+                self.deps = []
+                self.pending_count = array('i')
                 self.completed_tasks = set()
-                self.task_dependencies = {}
-                self.save_tasks()
+                self.task_dependencies = defaultdict(set)
+                self.task_by_name = {}
+                self._version += 1
+                self._executable_cache.cache_clear()
+                self._write_snapshot()
         else:
-            self.tasks = []
+            self.tasks = IndexedHeap()
+            self.names = []
+            self.priorities = array('q')
+            self.deadlines = []
+            self.deps = []
+            self.pending_count = array('i')
             self.completed_tasks = set()
-            self.task_dependencies = {}
-            self.save_tasks()
+            self.task_dependencies = defaultdict(set)
+            self.task_by_name = {}
+            self._version += 1
+            self._executable_cache.cache_clear()
+            self._write_snapshot()
+
+    def _drop_duplicate(self, task):
+        """
+        Descarta una tarea repetida al cargar y borra las dependencias
+        inversas que solo ella aportaba.
+        """
+        name = task['name']
+        kept_deps = self.deps[self.task_by_name[name]]
+        for dep in task['dependencies']:
+            if dep not in kept_deps and dep in self.task_dependencies:
+                self.task_dependencies[dep].discard(name)
+                if not self.task_dependencies[dep]:
+                    del self.task_dependencies[dep]
+        print(f"⚠️ Tarea repetida '{name}' descartada al cargar.")
+
+    def _open_journal(self):
+        """
+        Reaplica el diario sobre la instantánea cargada y lo deja abierto en
+        modo append. Un diario de otra generación ya está incluido en la
+        instantánea y se descarta.
+        """
+        operations = []
+        valid_size = 0
+        if os.path.exists(self.journal_filename):
+            with open(self.journal_filename, 'rb') as f:
+                for line in f:
+                    # Una última línea incompleta tras una caída se descarta
+                    if not line.endswith(b'\n'):
+                        break
+                    try:
+                        operations.append(_loads(line))
+                    except ValueError:
+                        break
+                    valid_size += len(line)
+        
+        if operations and operations[0] == {'op': 'generation', 'value': self._generation}:
+            for operation in operations[1:]:
+                if operation['op'] == 'add' and operation['task']['name'] not in self.task_by_name:
+                    task = operation['task']
+                    self._insert_task(task['name'], task['priority'], task['dependencies'], task['deadline'])
+                elif operation['op'] == 'complete' and operation['name'] in self.task_by_name:
+                    self._remove_task(operation['name'])
+            self._repack_tasks()
+            self._journal_fd = os.open(self.journal_filename, os.O_WRONLY | os.O_APPEND)
+            os.ftruncate(self._journal_fd, valid_size)
+            self._journal_size = valid_size
+        else:
+            self._reset_journal()
+        self._snapshot_size = os.path.getsize(self.filename) if os.path.exists(self.filename) else 0
+
+    def _reset_journal(self, write_snapshot=False):
+        """
+        Sustituye el diario por uno vacío con la cabecera de la generación
+        actual y, si se indica, guarda antes la instantánea. El diario nuevo
+        se prepara en un archivo temporal: si algo falla, el anterior sigue
+        abierto e intacto. Devuelve si se ha podido guardar la instantánea.
+        """
+        tmp_filename = self.journal_filename + '.tmp'
+        header = _dumps({'op': 'generation', 'value': self._generation}) + b'\n'
+        fd = os.open(tmp_filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_TRUNC, 0o644)
+        snapshot_written = False
+        try:
+            if os.write(fd, header) != len(header):
+                raise OSError(f"Escritura incompleta en {tmp_filename}")
+            if write_snapshot:
+                snapshot_written = self._write_snapshot()
+                if not snapshot_written:
+                    os.close(fd)
+                    os.remove(tmp_filename)
+                    return False
+            os.replace(tmp_filename, self.journal_filename)
+        except OSError:
+            os.close(fd)
+            os.remove(tmp_filename)
+            if snapshot_written:
+                # La instantánea ya es de la nueva generación: lo que se
+                # escribiera en el diario anterior se perdería al cargarla
+                os.close(self._journal_fd)
+                self._journal_fd = None
+            raise
+        if self._journal_fd is not None:
+            os.close(self._journal_fd)
+        self._journal_fd = fd
+        self._journal_size = len(header)
+        return True
+
+    def _ensure_open(self):
+        """
+        Impide modificar un gestor cuyo diario ya se ha cerrado.
+        """
+        if self._journal_fd is None:
+            raise ValueError("El gestor de tareas está cerrado")
+
+    def _append_journal(self, operation):
+        """
+        Añade una operación al final del diario. Si la escritura falla, se
+        deshace la parte escrita para no dejar una línea incompleta.
+        """
+        line = _dumps(operation) + b'\n'
+        try:
+            if os.write(self._journal_fd, line) != len(line):
+                raise OSError(f"Escritura incompleta en {self.journal_filename}")
+        except OSError:
+            os.ftruncate(self._journal_fd, self._journal_size)
+            raise
+        self._journal_size += len(line)
+
+    def compact(self):
+        """
+        Escribe una instantánea nueva, vacía el diario y libera los ids de las
+        tareas completadas. Devuelve si se ha podido guardar la instantánea.
+        """
+        self._ensure_open()
+        self._repack_tasks()
+        self._generation += 1
+        try:
+            if self._reset_journal(write_snapshot=True):
+                return True
+        except OSError:
+            if self._journal_fd is not None:
+                self._generation -= 1
+            raise
+        self._generation -= 1
+        return False
+
+    def flush(self):
+        """
+        Compacta el diario cuando ocupa más del doble que la instantánea.
+        """
+        if self._journal_fd is not None and self._journal_size > 2 * self._snapshot_size:
+            self.compact()
+
+    def close(self):
+        """
+        Compacta si hace falta y cierra el diario.
+        """
+        if self._journal_fd is not None:
+            try:
+                self.flush()
+            finally:
+                if self._journal_fd is not None:
+                    os.close(self._journal_fd)
+                    self._journal_fd = None
+        atexit.unregister(self.close)
 
     def save_tasks(self):
         """
-        Guarda las tareas en un archivo JSON.
+        Guarda todas las tareas en la instantánea y vacía el diario, para que
+        sus operaciones no se vuelvan a aplicar al cargarla.
+        """
+        return self.compact()
+
+    def _write_snapshot(self):
+        """
+        Guarda las tareas en un archivo JSON de forma atómica.
         """
         try:
             data = {
-                'tasks': [task for _, _, task in self.tasks],
+                'generation': self._generation,
+                'tasks': [self.get_task(task_id) for task_id in sorted(task_id for _, task_id in self.tasks)],
                 'completed_tasks': list(self.completed_tasks),
-                'task_dependencies': self.task_dependencies
+                'task_dependencies': {
+                    dep: sorted(dependientes) for dep, dependientes in self.task_dependencies.items()
+                }
             }
-            with open(self.filename, 'w') as f:
-                json.dump(data, f, indent=4)
+            tmp_filename = self.filename + '.tmp'
+            with open(tmp_filename, 'wb') as f:
+                f.write(_dumps(data))
+            os.replace(tmp_filename, self.filename)
+            self._snapshot_size = os.path.getsize(self.filename)
+            return True
         except Exception as e:
             print(f"Error al guardar tareas: {e}")
+            return False
 
 def main():
     task_manager = TaskManager()
@@ -233,11 +781,13 @@ def main():
                 task_manager.add_task(nombre, prioridad, dependencias, deadline)
             
             elif opcion == '2':
-                if not task_manager.tasks:
+                pendientes = task_manager.sorted_tasks()
+                if not pendientes:
                     print("\n📭 No hay tareas pendientes.")
                 else:
                     print("\n📋 TAREAS PENDIENTES:")
-                    for _, _, task in sorted(task_manager.tasks, key=lambda x: x[0]):
+                    for _, task_id in pendientes:
+                        task = task_manager.get_task(task_id)
                         print(f"\n📍 {task['name']} (Prioridad: {task['priority']})")
                         if task['dependencies']:
                             print("   🔗 Dependencias:")
@@ -254,7 +804,7 @@ def main():
                 print("\n🔗 DEPENDENCIAS REGISTRADAS:")
                 for tarea, dependientes in task_manager.task_dependencies.items():
                     print(f"\n📍 Tarea '{tarea}' es requerida para:")
-                    for dep in dependientes:
+                    for dep in sorted(dependientes):
                         print(f"   - {dep}")
             
             elif opcion == '5':
@@ -269,6 +819,12 @@ def main():
         
         except Exception as e:
             print(f"\n❌ Error: {e}")
+        
+        finally:
+            try:
+                task_manager.flush()
+            except OSError as e:
+                print(f"\n❌ Error al compactar el diario: {e}")
 
 if __name__ == "__main__":
     main()